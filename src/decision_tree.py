@@ -5,6 +5,37 @@ from collections import Counter
 from math import log2
 
 
+def check_max_depth(max_depth):
+    """
+    Raise a ValueError unless max_depth is an integer greater than zero.
+    """
+    if max_depth <= 0 or not isinstance(max_depth, int):
+        raise ValueError('max_depth must be '
+                         'an integer greater than zero')
+
+
+def check_gini_split_threshold(gini_split_threshold):
+    """
+    Raise a ValueError unless gini_split_threshold is between 0 and 1.
+    """
+    if gini_split_threshold < 0 or gini_split_threshold > 1:
+        raise ValueError('gini_split_threshold argument must '
+                         'be a float between 0 and 1')
+
+
+def majority(labels):
+    """
+    Return the most common label. Ties go to the label seen last
+    among the most common ones.
+    """
+    counts = Counter(labels)
+    max_val = max(counts.values())
+    for key, value in counts.items():
+        if value == max_val:
+            classification = key
+    return classification
+
+
 class Node:
     """
     Node that contains all information required in order to make predictions
@@ -53,6 +84,29 @@ class Node:
                          self.classification)
 
 
+class EncodedData:
+    """
+    Labeled data stored as one column per feature, with every feature's
+    row indices sorted by value once. DecisionTree.train_encoded can fit
+    on any subset of the rows without converting dicts or sorting again.
+    """
+
+    def __init__(self, labeled_data):
+        """
+        Encode labeled_data, which takes the same form DecisionTree.train
+        expects. Features are taken from the first row.
+        """
+        self.rows = list(labeled_data)
+        self.labels = [row[1] for row in self.rows]
+        self.columns = {}
+        self.sorted_indices = {}
+        for feature in self.rows[0][0].keys():
+            column = [row[0][feature] for row in self.rows]
+            self.columns[feature] = column
+            self.sorted_indices[feature] = sorted(range(len(column)),
+                                                  key=column.__getitem__)
+
+
 class DecisionTree:
     """
     A crude implementation of a decision tree that, for the time being,
@@ -63,9 +117,7 @@ class DecisionTree:
         """
         Instantiate a decision tree with a default depth of 2.
         """
-        if max_depth <= 0 or not isinstance(max_depth, int):
-            raise ValueError('max_depth must be '
-                             'an integer greater than zero')
+        check_max_depth(max_depth)
         self.max_depth = max_depth
         self.root = None
 
@@ -86,15 +138,29 @@ class DecisionTree:
             raise ValueError("method parameter must be "
                              "either 'gini' or 'entropy'")
 
-        if gini_split_threshold < 0 or gini_split_threshold > 1:
-            raise ValueError('gini_split_threshold argument must '
-                             'be a float between 0 and 1')
+        check_gini_split_threshold(gini_split_threshold)
 
         if method == 'gini':
-            self._cart(labeled_data, gini_split_threshold=gini_split_threshold)
+            self.root = self._cart(labeled_data,
+                                   gini_split_threshold=gini_split_threshold)
         elif method == 'entropy':
             self._id3(labeled_data)
 
+    def train_encoded(self, encoded, indices=None,
+                      gini_split_threshold=.25):
+        """
+        Train with the gini method on the rows of an EncodedData selected
+        by indices, or on all of them if indices is None. indices must be
+        in ascending order.
+
+        Builds the same tree train would build on those rows.
+        """
+        check_gini_split_threshold(gini_split_threshold)
+        if indices is None:
+            indices = range(len(encoded.rows))
+        self.root = self._cart_encoded(encoded, list(indices),
+                                       gini_split_threshold)
+
     def predict(self, data):
         """
         This will take a list of dictionaries and return a list of
@@ -168,11 +234,7 @@ class DecisionTree:
         labels = [label[1] for label in labeled_data]
         gini_threshold = gini_split_threshold * self._max_gini(labels)
         if depth >= self.max_depth or self._gini(labels) <= gini_threshold:
-            counts = Counter(labels)
-            max_val = max(counts.values())
-            for key, value in counts.items():
-                if value == max_val:
-                    classification = key
+            classification = majority(labels)
             return Node(len(labeled_data), labeled_data, classification, gini=self._gini(labels))
 
         lowest_cost = float('inf')
@@ -232,3 +294,111 @@ class DecisionTree:
         avg_minimums = sum(minim) / len(minim)
 
         return cost_min, avg_minimums, left_samples, right_samples
+
+    def _cart_encoded(self, encoded, indices, gini_split_threshold, depth=0):
+        """
+        The CART algorithm from _cart, run on row indices into an
+        EncodedData instead of on lists of rows.
+        """
+        labels = [encoded.labels[i] for i in indices]
+        values = [encoded.rows[i] for i in indices]
+        gini_threshold = gini_split_threshold * self._max_gini(labels)
+        if depth >= self.max_depth or self._gini(labels) <= gini_threshold:
+            return Node(len(indices), values, majority(labels),
+                        gini=self._gini(labels))
+
+        in_node = [False] * len(encoded.rows)
+        for i in indices:
+            in_node[i] = True
+
+        lowest_cost = float('inf')
+        for feature in encoded.rows[indices[0]][0].keys():
+            gini_calculations = self._gini_cost_encoded(encoded, indices,
+                                                        in_node, feature)
+            if gini_calculations[0] < lowest_cost:
+                lowest_cost, threshold, left, right = gini_calculations
+                chosen_feature = feature
+
+        node = Node(len(indices), values, encoded.labels[left[0]],
+                    threshold, chosen_feature, self._gini(labels))
+        node.left = self._cart_encoded(encoded, left, gini_split_threshold,
+                                       depth + 1)
+        node.right = self._cart_encoded(encoded, right, gini_split_threshold,
+                                        depth + 1)
+        return node
+
+    def _gini_cost_encoded(self, encoded, indices, in_node, feature_name):
+        """
+        Calculate the same cost, threshold and split as _gini_cost, but in
+        one pass over the feature's presorted values.
+
+        Walking the threshold grid in order only ever moves samples from
+        the right side to the left, so label counts are updated instead of
+        recounted. The gini of each side sums its label counts in order of
+        first appearance, the same order Counter uses in _gini, so costs
+        and ties come out exactly equal.
+        """
+        column = encoded.columns[feature_name]
+        labels = encoded.labels
+        order = [i for i in encoded.sorted_indices[feature_name]
+                 if in_node[i]]
+        len_labeled_data = len(order)
+
+        right_firsts = {len_labeled_data: {}}
+        firsts = {}
+        for pos in range(len_labeled_data - 1, -1, -1):
+            idx = order[pos]
+            if idx < firsts.get(labels[idx], idx + 1):
+                firsts[labels[idx]] = idx
+            if pos == 0 or column[order[pos - 1]] != column[idx]:
+                right_firsts[pos] = dict(firsts)
+
+        totals = Counter(labels[i] for i in indices)
+        left_counts = Counter()
+        left_firsts = {}
+
+        minim = []
+        cost_min = float('inf')
+        split_pos = None
+        pos = 0
+        last_pos = None
+        max_feature = int(column[order[-1]]) * 100
+        min_feature = int(column[order[0]]) * 100
+        for x in (i / 100 for i in range(min_feature, max_feature + 1)):
+            while pos < len_labeled_data and column[order[pos]] <= x:
+                idx = order[pos]
+                left_counts[labels[idx]] += 1
+                if idx < left_firsts.get(labels[idx], idx + 1):
+                    left_firsts[labels[idx]] = idx
+                pos += 1
+            if pos != last_pos:
+                left_gini = _ordered_gini(left_counts, left_firsts, pos)
+                right_gini = _ordered_gini(totals - left_counts,
+                                           right_firsts[pos],
+                                           len_labeled_data - pos)
+                cost = (pos * left_gini / len_labeled_data +
+                        (len_labeled_data - pos) * right_gini /
+                        len_labeled_data)
+                last_pos = pos
+            if cost < cost_min:
+                cost_min = cost
+                minim = [x]
+                split_pos = pos
+            elif cost == cost_min:
+                minim.append(x)
+        avg_minimums = sum(minim) / len(minim)
+
+        left_set = set(order[:split_pos])
+        left = [i for i in indices if i in left_set]
+        right = [i for i in indices if i not in left_set]
+        return cost_min, avg_minimums, left, right
+
+
+def _ordered_gini(counts, firsts, total):
+    """
+    Gini impurity from label counts, summed in order of each label's first
+    row index so that it matches DecisionTree._gini on the rows in order.
+    """
+    ordered = sorted((label for label in counts if counts[label]),
+                     key=firsts.__getitem__)
+    return 1 - sum((counts[label] / total)**2 for label in ordered)
@@ -0,0 +1,227 @@
+"""
+Module containing cross validation and grid search helpers for the
+DecisionTree class.
+"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from time import perf_counter
+
+from src.decision_tree import (DecisionTree, EncodedData, Node,
+                               check_gini_split_threshold, check_max_depth,
+                               majority)
+
+
+class FoldResult(namedtuple('FoldResult', ['max_depth',
+                                           'gini_split_threshold', 'fold',
+                                           'score', 'shared_fit_time',
+                                           'prune_time', 'predict_time'])):
+    """
+    Score and timings in seconds for one depth, threshold and fold.
+
+    Every depth for a fold and threshold is pruned from one tree trained
+    to the deepest requested depth. shared_fit_time is the time spent
+    training that tree and is the same for all of those depths.
+    prune_time is the extra time spent cutting it down to max_depth, so
+    neither field is the cost of training a tree at max_depth alone.
+    """
+    __slots__ = ()
+
+
+class SearchResult(namedtuple('SearchResult', ['max_depth',
+                                               'gini_split_threshold',
+                                               'score', 'shared_fit_time',
+                                               'prune_time',
+                                               'predict_time'])):
+    """
+    FoldResult score and timings for one depth and threshold, averaged
+    over the folds.
+    """
+    __slots__ = ()
+
+
+_worker_encoded = None
+
+
+def cross_validate(labeled_data, max_depth=2, gini_split_threshold=.25,
+                   n_folds=5, n_jobs=1):
+    """
+    Train and score a tree on each of n_folds folds of labeled_data, which
+    takes the same form as DecisionTree.train expects.
+
+    Returns a list of FoldResult rows, one per fold, holding the accuracy
+    on the held out fold along with its timings.
+    """
+    return _run_grid(labeled_data, [max_depth], [gini_split_threshold],
+                     n_folds, n_jobs)
+
+
+def grid_search(labeled_data, max_depths=(2,), gini_split_thresholds=(.25,),
+                n_folds=5, n_jobs=1):
+    """
+    Cross validate every combination of max_depths and
+    gini_split_thresholds.
+
+    Returns a list of SearchResult rows in grid order, each holding the
+    score and timings averaged over the folds.
+    """
+    fold_results = _run_grid(labeled_data, max_depths, gini_split_thresholds,
+                             n_folds, n_jobs)
+    grouped = {}
+    for row in fold_results:
+        key = (row.max_depth, row.gini_split_threshold)
+        grouped.setdefault(key, []).append(row)
+
+    results = []
+    for (max_depth, threshold), rows in grouped.items():
+        results.append(SearchResult(
+            max_depth,
+            threshold,
+            sum(row.score for row in rows) / len(rows),
+            sum(row.shared_fit_time for row in rows) / len(rows),
+            sum(row.prune_time for row in rows) / len(rows),
+            sum(row.predict_time for row in rows) / len(rows)))
+    return results
+
+
+def _run_grid(labeled_data, max_depths, gini_split_thresholds,
+              n_folds, n_jobs):
+    """
+    Validate the arguments and run one job per fold and threshold.
+
+    The data is encoded and presorted once, here, and handed to each
+    worker process once. Every depth for a given fold and threshold is
+    served by a single tree trained to the deepest requested depth, since
+    CART picks the same splits regardless of max_depth. Results are
+    sorted into grid order.
+    """
+    if not isinstance(n_folds, int) or not 2 <= n_folds <= len(labeled_data):
+        raise ValueError('n_folds must be an integer between 2 '
+                         'and the number of samples')
+
+    if not isinstance(n_jobs, int) or n_jobs <= 0:
+        raise ValueError('n_jobs must be an integer greater than zero')
+
+    max_depths = list(max_depths)
+    gini_split_thresholds = list(gini_split_thresholds)
+    if not max_depths or not gini_split_thresholds:
+        raise ValueError('max_depths and gini_split_thresholds '
+                         'must not be empty')
+
+    for depth in max_depths:
+        check_max_depth(depth)
+
+    for threshold in gini_split_thresholds:
+        check_gini_split_threshold(threshold)
+
+    jobs = [(fold, n_folds, threshold, max_depths)
+            for threshold, fold in product(gini_split_thresholds,
+                                           range(n_folds))]
+
+    encoded = EncodedData(labeled_data)
+    if n_jobs == 1:
+        batches = [_run_job(encoded, *job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 initializer=_init_worker,
+                                 initargs=(encoded,)) as executor:
+            batches = list(executor.map(_run_worker_job, *zip(*jobs)))
+
+    rows = [row for batch in batches for row in batch]
+    order = {key: i for i, key in enumerate(product(max_depths,
+                                                    gini_split_thresholds))}
+    rows.sort(key=lambda row: (order[(row.max_depth,
+                                      row.gini_split_threshold)],
+                               row.fold))
+    return rows
+
+
+def _init_worker(encoded):
+    """
+    Keep the encoded data once per worker process so that jobs only need
+    to be sent fold and parameter information.
+    """
+    global _worker_encoded
+    _worker_encoded = encoded
+
+
+def _run_worker_job(*job):
+    """
+    Run a job in a worker process against its encoded data.
+    """
+    return _run_job(_worker_encoded, *job)
+
+
+def _fold_indices(n_samples, n_folds, fold):
+    """
+    Return the training and held out row indices for fold, both in
+    ascending order. Samples are dealt out round robin, so data sorted by
+    label still spreads every label across the folds.
+    """
+    train_indices = [i for i in range(n_samples) if i % n_folds != fold]
+    return train_indices, range(fold, n_samples, n_folds)
+
+
+def _run_job(encoded, fold, n_folds, gini_split_threshold, max_depths):
+    """
+    Fit one tree at the deepest requested depth on the training part of
+    fold, then score it pruned down to each of max_depths.
+    """
+    train_indices, test_indices = _fold_indices(len(encoded.rows), n_folds,
+                                                fold)
+
+    start = perf_counter()
+    full_tree = DecisionTree(max_depth=max(max_depths))
+    full_tree.train_encoded(encoded, train_indices,
+                            gini_split_threshold=gini_split_threshold)
+    shared_fit_time = perf_counter() - start
+
+    results = []
+    for depth in max_depths:
+        start = perf_counter()
+        tree = _prune(full_tree, depth)
+        prune_time = perf_counter() - start
+
+        start = perf_counter()
+        predicted = tree.predict(encoded.rows[i][0] for i in test_indices)
+        predict_time = perf_counter() - start
+
+        correct = sum(guess == encoded.labels[i]
+                      for guess, i in zip(predicted, test_indices))
+        results.append(FoldResult(depth, gini_split_threshold, fold,
+                                  correct / len(test_indices),
+                                  shared_fit_time, prune_time,
+                                  predict_time))
+    return results
+
+
+def _prune(tree, max_depth):
+    """
+    Return a new DecisionTree matching what retraining on tree's data with
+    a shallower max_depth would produce. Nodes below max_depth are dropped
+    and nodes at max_depth become leaves classified the same way CART
+    would.
+    """
+    pruned = DecisionTree(max_depth=max_depth)
+    if tree.root is not None:
+        pruned.root = _prune_node(tree.root, max_depth, 0)
+    return pruned
+
+
+def _prune_node(node, max_depth, depth):
+    """
+    Copy node and its children down to max_depth.
+    """
+    if node.feature is None:
+        return node
+
+    if depth >= max_depth:
+        labels = [value[1] for value in node.values]
+        return Node(node.samples_count, node.values,
+                    majority(labels), gini=node.gini)
+
+    new_node = Node(node.samples_count, node.values, node.classification,
+                    node.threshold, node.feature, node.gini)
+    new_node.left = _prune_node(node.left, max_depth, depth + 1)
+    new_node.right = _prune_node(node.right, max_depth, depth + 1)
+    return new_node
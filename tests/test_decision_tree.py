@@ -246,6 +246,31 @@ def test_predictions(loaded_tree):
                                                 'versicolor']
 
 
+def test_root_leaf_predicts():
+    """
+    Ensure a tree whose root is a leaf still predicts its majority label.
+    """
+    from src.decision_tree import DecisionTree
+    from tests.iris_petal_data import iris_data
+    tree = DecisionTree()
+    tree.train(iris_data, gini_split_threshold=1)
+    assert tree.root.feature is None
+    assert tree.predict(predictions) == [tree.root.classification] * 7
+
+
+def test_retrain_replaces_root(loaded_tree):
+    """
+    Ensure training an already trained tree replaces the old root.
+    """
+    from tests.iris_petal_data import iris_data
+    subset = [row for row in iris_data
+              if row[1] in ['versicolor', 'virginica']]
+    loaded_tree.train(subset)
+    assert loaded_tree.root.samples_count == 100
+    assert loaded_tree.root.feature == 'petal width (cm)'
+    assert 'setosa' not in loaded_tree.predict(predictions)
+
+
 def test_id3(decision_tree):
     """
     For now, assert that we get None when trying to train a tree using
@@ -256,3 +281,101 @@ def test_id3(decision_tree):
     tree = DecisionTree()
     tree.train(iris_data, method='entropy')
     assert tree.root is None
+
+
+def _tree_shape(node):
+    """
+    Flatten a tree into a comparable list of node attributes.
+    """
+    if node is None:
+        return [None]
+    return ([node.samples_count, node.values, node.classification,
+             node.threshold, node.feature, node.gini] +
+            _tree_shape(node.left) + _tree_shape(node.right))
+
+
+def _assert_same_training(data, indices, depth, threshold):
+    """
+    Train on the rows at indices with train and train_encoded and assert
+    both build the same tree. train raises an IndexError when its best
+    split leaves the left side empty, and train_encoded must too.
+    """
+    from src.decision_tree import DecisionTree, EncodedData
+    tree = DecisionTree(max_depth=depth)
+    encoded_tree = DecisionTree(max_depth=depth)
+    try:
+        tree.train([data[i] for i in indices],
+                   gini_split_threshold=threshold)
+    except IndexError:
+        with pytest.raises(IndexError):
+            encoded_tree.train_encoded(EncodedData(data), indices,
+                                       gini_split_threshold=threshold)
+        return
+    encoded_tree.train_encoded(EncodedData(data), indices,
+                               gini_split_threshold=threshold)
+    assert _tree_shape(encoded_tree.root) == _tree_shape(tree.root)
+
+
+def _random_data(seed, size=80):
+    """
+    Random labeled data with repeated values and labels that overlap.
+    """
+    rand = random.Random(seed)
+    return [({'a': round(rand.uniform(0, 4), 1),
+              'b': round(rand.uniform(-1, 3), 2),
+              'c': rand.randint(0, 3)},
+             rand.choice(['x', 'y', 'z']))
+            for _ in range(size)]
+
+
+def test_gini_cost_encoded_matches():
+    """
+    Ensure the presorted cost search agrees with _gini_cost on every
+    feature of the iris data.
+    """
+    from src.decision_tree import DecisionTree, EncodedData
+    from tests.iris_petal_data import iris_data
+    tree = DecisionTree()
+    encoded = EncodedData(iris_data)
+    indices = list(range(len(iris_data)))
+    in_node = [True] * len(iris_data)
+    for feature in iris_data[0][0]:
+        cost, threshold, left, right = tree._gini_cost(iris_data, feature)
+        encoded_cost = tree._gini_cost_encoded(encoded, indices, in_node,
+                                               feature)
+        assert encoded_cost[:2] == (cost, threshold)
+        assert [iris_data[i] for i in encoded_cost[2]] == left
+        assert [iris_data[i] for i in encoded_cost[3]] == right
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3, 4])
+@pytest.mark.parametrize('threshold', [0, .1, .25, 1])
+def test_train_encoded_matches_train_iris(depth, threshold):
+    """
+    Ensure training on encoded iris data builds the same tree as train.
+    """
+    from tests.iris_petal_data import iris_data
+    _assert_same_training(iris_data, range(len(iris_data)), depth,
+                          threshold)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_train_encoded_matches_train_subset(seed):
+    """
+    Ensure training on a subset of encoded random data builds the same
+    tree as train on that subset.
+    """
+    data = _random_data(seed)
+    indices = [i for i in range(len(data)) if i % 4 != seed % 4]
+    _assert_same_training(data, indices, 4, .1)
+
+
+def test_train_encoded_errors():
+    """
+    Ensure train_encoded checks gini_split_threshold like train does.
+    """
+    from src.decision_tree import DecisionTree, EncodedData
+    from tests.iris_petal_data import iris_data
+    with pytest.raises(ValueError):
+        DecisionTree().train_encoded(EncodedData(iris_data),
+                                     gini_split_threshold=1.25)
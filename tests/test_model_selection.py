@@ -0,0 +1,160 @@
+"""
+Module to test the cross validation and grid search helpers.
+"""
+import pytest
+
+
+def _shape(node):
+    """
+    Flatten a tree into a comparable list of node attributes.
+    """
+    if node is None:
+        return [None]
+    return ([node.samples_count, node.classification, node.threshold,
+             node.feature, node.gini] +
+            _shape(node.left) + _shape(node.right))
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3])
+def test_prune_matches_training(depth):
+    """
+    Ensure a deep tree pruned to depth is the same as one trained
+    to depth.
+    """
+    from src.decision_tree import DecisionTree
+    from src.model_selection import _prune
+    from tests.iris_petal_data import iris_data
+    deep = DecisionTree(max_depth=4)
+    deep.train(iris_data)
+    shallow = DecisionTree(max_depth=depth)
+    shallow.train(iris_data)
+    assert _shape(_prune(deep, depth).root) == _shape(shallow.root)
+
+
+def test_folds_cover_data():
+    """
+    Ensure every sample is held out exactly once and never trained on in
+    its own fold.
+    """
+    from src.model_selection import _fold_indices
+    held_out = []
+    for fold in range(5):
+        train_indices, test_indices = _fold_indices(150, 5, fold)
+        assert not set(train_indices) & set(test_indices)
+        assert len(train_indices) + len(test_indices) == 150
+        held_out.extend(test_indices)
+    assert sorted(held_out) == list(range(150))
+
+
+def test_folds_split_labels_evenly():
+    """
+    Ensure each fold holds out the same number of every iris label, even
+    though the data is sorted by label.
+    """
+    from collections import Counter
+    from src.model_selection import _fold_indices
+    from tests.iris_petal_data import iris_data
+    for fold in range(5):
+        _, test_indices = _fold_indices(len(iris_data), 5, fold)
+        counts = Counter(iris_data[i][1] for i in test_indices)
+        assert sorted(counts.values()) == [10, 10, 10]
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3])
+def test_cross_validate_matches_manual_folds(depth):
+    """
+    Ensure cross_validate scores match training and predicting by hand
+    on the same folds.
+    """
+    from src.decision_tree import DecisionTree
+    from src.model_selection import cross_validate
+    from tests.iris_petal_data import iris_data
+    results = cross_validate(iris_data, max_depth=depth, n_folds=3)
+    for fold, row in enumerate(results):
+        train = [data for i, data in enumerate(iris_data) if i % 3 != fold]
+        test = [data for i, data in enumerate(iris_data) if i % 3 == fold]
+        tree = DecisionTree(max_depth=depth)
+        tree.train(train)
+        predicted = tree.predict([data[0] for data in test])
+        correct = sum(guess == data[1] for guess, data in zip(predicted,
+                                                              test))
+        assert row.score == correct / len(test)
+
+
+def test_cross_validate():
+    """
+    Ensure we get one row per fold with sensible scores on the iris data.
+    """
+    from src.model_selection import cross_validate
+    from tests.iris_petal_data import iris_data
+    results = cross_validate(iris_data, n_folds=5)
+    assert [row.fold for row in results] == [0, 1, 2, 3, 4]
+    assert sum(row.score for row in results) / len(results) > .9
+    assert all(min(row.shared_fit_time, row.prune_time,
+                   row.predict_time) >= 0 for row in results)
+
+
+def test_grid_search_order():
+    """
+    Ensure grid search returns one row per parameter combination in grid
+    order.
+    """
+    from src.model_selection import grid_search
+    from tests.iris_petal_data import iris_data
+    results = grid_search(iris_data, max_depths=[1, 2],
+                          gini_split_thresholds=[.1, .25], n_folds=3)
+    assert [(row.max_depth, row.gini_split_threshold)
+            for row in results] == [(1, .1), (1, .25), (2, .1), (2, .25)]
+    assert results[0].score < results[2].score
+
+
+def test_grid_search_shares_fit_time():
+    """
+    Ensure depths pruned from the same tree report the same shared fit
+    time and their own prune time.
+    """
+    from src.model_selection import grid_search
+    from tests.iris_petal_data import iris_data
+    shallow, deep = grid_search(iris_data, max_depths=[1, 3], n_folds=3)
+    assert shallow.shared_fit_time == deep.shared_fit_time
+    assert shallow.prune_time >= 0 and deep.prune_time >= 0
+
+
+def test_grid_search_parallel_matches_serial():
+    """
+    Ensure running folds on a process pool gives the same scores.
+    """
+    from src.model_selection import grid_search
+    from tests.iris_petal_data import iris_data
+    serial = grid_search(iris_data, max_depths=[1, 2], n_folds=3)
+    parallel = grid_search(iris_data, max_depths=[1, 2], n_folds=3,
+                           n_jobs=2)
+    assert [row.score for row in serial] == [row.score for row in parallel]
+
+
+def test_root_leaf_tree():
+    """
+    Ensure a threshold that turns the root into a leaf still predicts.
+    """
+    from src.model_selection import cross_validate
+    from tests.iris_petal_data import iris_data
+    results = cross_validate(iris_data, gini_split_threshold=1, n_folds=3)
+    assert all(row.score < .5 for row in results)
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'n_folds': 1},
+    {'n_folds': 151},
+    {'n_jobs': 0},
+    {'max_depths': []},
+    {'max_depths': [0]},
+    {'gini_split_thresholds': [1.5]},
+])
+def test_grid_search_errors(kwargs):
+    """
+    Ensure bad arguments raise a ValueError.
+    """
+    from src.model_selection import grid_search
+    from tests.iris_petal_data import iris_data
+    with pytest.raises(ValueError):
+        grid_search(iris_data, **kwargs)